@@ -11,16 +11,29 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import  ConfigEntryNotReady
-from homeassistant.helpers import device_registry as dr
-
-from .const import CONF_STATION_ID
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    DOMAIN,
+    CONF_STATION_ID,
+    CONF_ARCHIVE_READINGS,
+    CONF_AGGREGATION_WINDOW,
+    SensorKeys,
+)
 from .config_flow import create_sunways_client
 from .coordinator import SunwaysStationOverviewUpdateCoordinator
 from .api.client import SunwaysClient
+from .archive import ReadingArchive, remove_archive
+from .metrics import SunwaysMetricsView
+from .services import async_setup_services
+from .websocket import async_setup_websocket
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 SCAN_INTERVAL = timedelta(seconds=60)
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 @dataclass(slots=True)
 class SunwaysRuntimeData:
@@ -28,10 +41,19 @@ class SunwaysRuntimeData:
 
     client: SunwaysClient
     coordinator: SunwaysStationOverviewUpdateCoordinator
+    archive: ReadingArchive | None = None
 
 type SunwaysConfigEntry = ConfigEntry[SunwaysRuntimeData]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Sunways services."""
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    hass.http.register_view(SunwaysMetricsView(hass))
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: SunwaysConfigEntry) -> bool:
     """Set up the sensors from a ConfigEntry."""
 
@@ -39,24 +61,92 @@ async def async_setup_entry(hass: HomeAssistant, entry: SunwaysConfigEntry) -> b
         client = await create_sunways_client(
             hass,
             MappingProxyType(entry.data),
+            entry.options,
         )
     except Exception as err:
         raise ConfigEntryNotReady from err
 
-    coordinator = SunwaysStationOverviewUpdateCoordinator(
-        hass,
-        _LOGGER,
-        client,
-        entry.data[CONF_STATION_ID]
-    )
-    await coordinator.async_config_entry_first_refresh()
+    station_id = entry.data[CONF_STATION_ID]
+    archive = None
+    coordinator = None
+
+    try:
+        # Open the connection outside the coordinator's update timeout
+        await client.warm_up()
+
+        archive_path = _archive_path(hass, station_id)
+        if entry.options.get(CONF_ARCHIVE_READINGS, False):
+            archive = await hass.async_add_executor_job(
+                ReadingArchive, archive_path, list(SensorKeys)
+            )
+        else:
+            # Drop the readings archived before the option was turned off
+            await hass.async_add_executor_job(remove_archive, archive_path)
+
+        aggregation_window = None
+        if window := entry.options.get(CONF_AGGREGATION_WINDOW, 0):
+            aggregation_window = timedelta(seconds=window)
+
+        coordinator = SunwaysStationOverviewUpdateCoordinator(
+            hass,
+            _LOGGER,
+            client,
+            station_id,
+            archive,
+            aggregation_window
+        )
+        await coordinator.async_config_entry_first_refresh()
+
+        entry.runtime_data = SunwaysRuntimeData(
+            client=client, coordinator=coordinator, archive=archive
+        )
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except BaseException:
+        # A failed setup is not unloaded, release what was acquired so far
+        await _async_release(hass, client, coordinator, archive)
+        raise
 
-    entry.runtime_data = SunwaysRuntimeData(client=client, coordinator=coordinator)
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
+def _archive_path(hass: HomeAssistant, station_id: str) -> str:
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}_archive_{station_id}.bin")
+
+
+async def _async_release(
+    hass: HomeAssistant,
+    client: SunwaysClient,
+    coordinator: SunwaysStationOverviewUpdateCoordinator | None,
+    archive: ReadingArchive | None,
+) -> None:
+    """Release everything held for an entry, in reverse order of creation."""
+    if coordinator:
+        await coordinator.async_shutdown()
+    if archive:
+        await hass.async_add_executor_job(archive.close)
+    await client.close()
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: SunwaysConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: SunwaysConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        runtime_data = entry.runtime_data
+        await _async_release(
+            hass, runtime_data.client, runtime_data.coordinator, runtime_data.archive
+        )
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: SunwaysConfigEntry) -> None:
+    """Remove the archived readings of a deleted config entry."""
+    await hass.async_add_executor_job(
+        remove_archive, _archive_path(hass, entry.data[CONF_STATION_ID])
+    )
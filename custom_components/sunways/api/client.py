@@ -111,10 +111,14 @@ class SunwaysClient:
         self,
         email: str,
         password: str,
-        websession: ClientSession,
-        token_jar: TokenJar | None = None
+        websession: ClientSession | None,
+        token_jar: TokenJar | None = None,
+        hedge_requests: bool = False,
+        trace_requests: bool = False
     ):
-        self._api = SunwaysApiConnection(email, password, websession, token_jar)
+        self._api = SunwaysApiConnection(
+            email, password, websession, token_jar, hedge_requests, trace_requests
+        )
 
     async def __aenter__(self):
         await self._api.__aenter__()
@@ -125,6 +129,24 @@ class SunwaysClient:
         # Close the web session, if we created it (i.e. it was not passed in)
         return await self._api.__aexit__(*args)
 
+    @property
+    def metrics(self) -> dict[str, int]:
+        """Counters of the requests made by the client."""
+        return self._api.metrics
+
+    @property
+    def request_traces(self) -> list[dict[str, Any]]:
+        """The slowest traced requests, if tracing is enabled."""
+        return self._api.request_traces
+
+    async def close(self):
+        """Forget the login, and close the web session if it is owned by the client."""
+        await self._api.close()
+
+    async def warm_up(self):
+        """Open a connection to the API ahead of the first request."""
+        await self._api.warm_up()
+
     async def get_stations(self) -> list[SunwaysStation]:
         """Get the availabile stations."""
         result = await self._api.request("get", API_STATION_LIST)
@@ -1,13 +1,18 @@
 """Internal Sunways client."""
 
+import asyncio
 import hashlib
 import base64
+import logging
+import statistics
+import sys
 import time
+from collections import deque
 from typing import Any
 from dataclasses import dataclass, asdict
 
 from urllib.parse import urljoin
-from aiohttp import Payload, client_exceptions, CookieJar
+from aiohttp import ClientTimeout, Payload, client_exceptions, CookieJar, TCPConnector
 from aiohttp.client import ClientSession
 
 from .exceptions import (
@@ -15,7 +20,9 @@ from .exceptions import (
     LoginFailed,
     RequestFailed,
 )
+from .tracing import RequestTrace, RequestTracer
 
+_LOGGER = logging.getLogger(__name__)
 
 _API_HOST = "https://api.sunways-portal.com"
 _API_LOGIN = "/monitor/auth/login"
@@ -27,6 +34,35 @@ API_STATION_OVERVIEW = "/monitor/core/power/station/overview/getSingleStationOve
 
 ASSUMED_TOKEN_LIFETIME = 60 * 60
 
+# Connector tuning for the integration owned session. The keep-alive outlasts
+# the coordinator's fixed poll interval so the TLS connection is reused between
+# polls; longer gaps of a schedule aligned to the portal's updates are bridged
+# by a warm-up shortly before the poll.
+CONNECTION_LIMIT_PER_HOST = 4
+DNS_CACHE_TTL = 10 * 60
+KEEPALIVE_TIMEOUT = 90
+
+# Per-phase budgets (seconds): establishing a connection, the token check and
+# login round trip, and receiving the response. A request is cut off after its
+# connect and read budgets, even while data keeps trickling in.
+CONNECT_TIMEOUT = 5
+AUTH_TIMEOUT = 10
+READ_TIMEOUT = 10
+REQUEST_TIMEOUT = CONNECT_TIMEOUT + READ_TIMEOUT
+
+# Hedged requests: a second GET is sent once the first one runs longer than
+# the p95 latency of recent requests.
+HEDGE_LATENCY_SAMPLES = 50
+HEDGE_MIN_SAMPLES = 10
+HEDGE_DEFAULT_DELAY = 2.0
+HEDGE_MIN_DELAY = 0.25
+
+# Counters kept by the connection, exposed as client metrics
+METRIC_REQUESTS = "requests"
+METRIC_REQUEST_FAILURES = "request_failures"
+METRIC_LOGINS = "logins"
+METRIC_HEDGED_REQUESTS = "hedged_requests"
+
 
 @dataclass
 class TokenJar:
@@ -49,8 +85,10 @@ class SunwaysApiConnection:
         self,
         email: str,
         password: str,
-        websession: ClientSession,
-        token_jar: TokenJar | None = None
+        websession: ClientSession | None,
+        token_jar: TokenJar | None = None,
+        hedge_requests: bool = False,
+        trace_requests: bool = False
     ):
         self._url = _API_HOST
         self._email = email
@@ -60,12 +98,36 @@ class SunwaysApiConnection:
         self._verify_ssl = True
         self._token_jar = token_jar
         self._token_ttl = ASSUMED_TOKEN_LIFETIME
+        self._own_session = False
+        self._closed = False
+        self._timeout = ClientTimeout(
+            total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT
+        )
+        self._hedge_requests = hedge_requests
+        self._latencies: deque[float] = deque(maxlen=HEDGE_LATENCY_SAMPLES)
+        self._tracer = RequestTracer() if trace_requests else None
+        self._metrics = dict.fromkeys(
+            (METRIC_REQUESTS, METRIC_REQUEST_FAILURES, METRIC_LOGINS, METRIC_HEDGED_REQUESTS), 0
+        )
 
     async def _get_session(self) -> ClientSession:
+        if self._closed:
+            raise ConnectionFailed("Connection is closed")
         if self._session is None:
             self._own_session = True
             jar = CookieJar(unsafe=True)
-            self._session = ClientSession(cookie_jar=jar)
+            connector = TCPConnector(
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                use_dns_cache=True,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            trace_configs = [self._tracer.trace_config] if self._tracer else None
+            self._session = ClientSession(
+                connector=connector,
+                cookie_jar=jar,
+                trace_configs=trace_configs,
+            )
         return self._session
 
     async def __aenter__(self):
@@ -73,28 +135,53 @@ class SunwaysApiConnection:
             await self.login()
             return self
         except Exception as error:
-            if self._own_session:
-                await self.close()
+            await self.close()
             raise error
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
         """Call when the client is disposed."""
-        # Close the web session, if we created it (i.e. it was not passed in)
-        if self._own_session:
-            await self.close()
+        await self.close()
         return False
 
+    @property
+    def metrics(self) -> dict[str, int]:
+        """Counters of the requests made by this connection."""
+        return self._metrics
+
+    @property
+    def request_traces(self) -> list[dict[str, Any]]:
+        """The slowest traced requests, if tracing is enabled."""
+        return self._tracer.slowest() if self._tracer else []
+
     async def close(self):
-        """Close the current web session."""
-        if self._session:
+        """Forget the login, and close the web session if we created it."""
+        self._closed = True
+        if self._session and self._own_session:
             await self._session.close()
-            self._session = None
+        self._session = None
+        self._token_jar = None
+        self._token_ttl = ASSUMED_TOKEN_LIFETIME
+        self._latencies.clear()
+
+    async def warm_up(self):
+        """Open a connection to the API host, so the first request skips the handshake."""
+        session = await self._get_session()
+        try:
+            async with session.head(
+                self._url,
+                ssl=self._verify_ssl,
+                timeout=ClientTimeout(total=CONNECT_TIMEOUT),
+            ) as response:
+                _LOGGER.debug("Warm-up connection to %s: HTTP %s", self._url, response.status)
+        except (client_exceptions.ClientError, TimeoutError) as err:
+            _LOGGER.debug("Warm-up connection to %s failed: %s", self._url, err)
 
     async def login(self):
         """Call to login and store token."""
 
         encoded_password = self._encode_password(self._password)
         auth = {"email": self._email, "password": encoded_password, "channel": 1}
+        self._metrics[METRIC_LOGINS] += 1
         await self._do_request("post", _API_LOGIN, json=auth)
 
     async def _check_login(self) -> bool:
@@ -114,7 +201,8 @@ class SunwaysApiConnection:
                 # Extend token ttl
                 self._token_ttl += ASSUMED_TOKEN_LIFETIME
                 return True
-        except:  # pylint: disable=bare-except  # noqa: E722
+        except Exception:  # pylint: disable=broad-except
+            # Not CancelledError: the auth budget and shutdowns cancel the probe
             pass
     
         # Reduce token ttl
@@ -124,10 +212,55 @@ class SunwaysApiConnection:
     async def request(self, method: str, end_point: str, params=None, json=None, data: Payload | None = None) -> Any:
         """Perform a request to the API, with authentication"""
 
-        if not await self._check_login():
-            await self.login()
+        try:
+            async with asyncio.timeout(AUTH_TIMEOUT):
+                if not await self._check_login():
+                    await self.login()
+        except TimeoutError as err:
+            raise ConnectionFailed("Authentication timed out") from err
+
+        if self._hedge_requests and method == "get":
+            return await self._do_hedged_request(end_point, params)
+
+        return await self._do_timed_request(method, end_point, params=params, json=json, data=data)
 
-        return await self._do_request(method, end_point, params=params, json=json, data=data)
+    def _hedge_delay(self) -> float:
+        """Delay before hedging, based on the p95 latency of recent requests."""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        p95 = statistics.quantiles(self._latencies, n=20)[-1]
+        return max(p95, HEDGE_MIN_DELAY)
+
+    async def _do_hedged_request(self, end_point: str, params=None) -> Any:
+        """Perform an idempotent GET, racing a second request if the first is slow."""
+
+        pending = {asyncio.create_task(self._do_timed_request("get", end_point, params=params))}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_delay())
+            if not done:
+                _LOGGER.debug("Hedging slow request to %s", end_point)
+                self._metrics[METRIC_HEDGED_REQUESTS] += 1
+                pending.add(asyncio.create_task(self._do_timed_request("get", end_point, params=params)))
+
+            # Keep the first successful response, fall back to the last failure
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _do_timed_request(self, method: str, end_point: str, params=None, json=None, data: Payload | None = None) -> Any:
+        """Perform a request to the API, recording its latency."""
+
+        start = time.monotonic()
+        result = await self._do_request(method, end_point, params=params, json=json, data=data)
+        self._latencies.append(time.monotonic() - start)
+        return result
 
     async def _do_request(self, method: str, end_point: str, params=None, json=None, data: Payload | None = None) -> Any:
         """Perform a request to the API, and unpack the response."""
@@ -142,6 +275,12 @@ class SunwaysApiConnection:
             # todo make session.cookie_jar.update_cookies work
             headers["Cookie"] = f"token={self._token_jar.token}"
 
+        trace = None
+        if self._tracer:
+            station_id = params.get("id") if isinstance(params, dict) else None
+            trace = RequestTrace(end_point, station_id)
+
+        self._metrics[METRIC_REQUESTS] += 1
         try:
             async with session.request(
                 method,
@@ -151,10 +290,13 @@ class SunwaysApiConnection:
                 json=json,
                 data=data,
                 ssl=self._verify_ssl,
+                timeout=self._timeout,
+                trace_request_ctx=trace,
             ) as response:
                 if response.status != 200:
                     if response.content_type == "application/json":
-                        content = await response.json(encoding="utf-8")
+                        async with asyncio.timeout(READ_TIMEOUT):
+                            content = await response.json(encoding="utf-8")
                         self._check_application_errors(content)
 
                     raise RequestFailed(response.status, "HTTP Request Error")
@@ -163,7 +305,13 @@ class SunwaysApiConnection:
                 if response.content_type != "application/json":
                     raise RequestFailed(0, "Invalid response body")
 
-                content = await response.json(encoding="utf-8")
+                if trace:
+                    trace.start("decode")
+                # The body as a whole, sock_read only bounds each read
+                async with asyncio.timeout(READ_TIMEOUT):
+                    content = await response.json(encoding="utf-8")
+                if trace:
+                    trace.stop("decode")
                 self._check_application_errors(content)
 
                 # The JWT token is returned in the header in login response
@@ -178,8 +326,21 @@ class SunwaysApiConnection:
 
         except client_exceptions.ClientConnectionError as err:
             raise ConnectionFailed(err) from err
+        except TimeoutError as err:
+            raise ConnectionFailed("Request timed out") from err
         except client_exceptions.ClientError as err:
             raise RequestFailed(0, f"Unexpected error: {err}") from None
+        finally:
+            # The exception being raised, if any. Nobody waited for a cancelled
+            # request, e.g. the loser of a hedge, so it neither fails nor is traced
+            error = sys.exc_info()[1]
+            cancelled = isinstance(error, asyncio.CancelledError)
+            if error is not None and not cancelled:
+                self._metrics[METRIC_REQUEST_FAILURES] += 1
+            if trace and not cancelled:
+                if error is not None:
+                    trace.error = repr(error)
+                self._tracer.record(trace)
 
     def _check_application_errors(self, response):
         if not isinstance(response, dict):
@@ -0,0 +1,145 @@
+"""Request tracing for the Sunways API connection."""
+
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import TraceConfig
+from aiohttp.client import ClientSession
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_MAX_SLOWEST = 20
+TRACE_SLOW_THRESHOLD = 5.0
+# Traces older than this are dropped, so an old outage does not linger
+TRACE_MAX_AGE = 24 * 60 * 60
+
+
+@dataclass
+class RequestTrace:
+    """Per-phase timings (seconds) of a single API request.
+
+    aiohttp reports TCP connect and TLS handshake as one connection phase.
+    First byte is measured from having a connection to receiving the headers.
+    """
+
+    end_point: str
+    station_id: str | None = None
+    started: float = field(default_factory=time.time)
+    dns: float | None = None
+    connect: float | None = None
+    reused_connection: bool = False
+    first_byte: float | None = None
+    decode: float | None = None
+    total: float | None = None
+    error: str | None = None
+    _marks: dict[str, float] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.start("total")
+
+    def start(self, phase: str):
+        """Mark the start of a phase."""
+        self._marks[phase] = time.perf_counter()
+
+    def stop(self, phase: str):
+        """Store the duration of a phase started before."""
+        if phase in self._marks:
+            setattr(self, phase, time.perf_counter() - self._marks.pop(phase))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trace without internal state."""
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+
+class RequestTracer:
+    """Collects request traces and keeps the slowest ones."""
+
+    def __init__(
+        self,
+        max_traces: int = TRACE_MAX_SLOWEST,
+        slow_threshold: float = TRACE_SLOW_THRESHOLD,
+        max_age: float = TRACE_MAX_AGE
+    ):
+        self._max_traces = max_traces
+        self._slow_threshold = slow_threshold
+        self._max_age = max_age
+        self._slowest: list[tuple[float, int, RequestTrace]] = []
+        self._counter = itertools.count()
+
+        self.trace_config = TraceConfig()
+        self.trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        self.trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        self.trace_config.on_connection_create_start.append(self._on_connect_start)
+        self.trace_config.on_connection_create_end.append(self._on_connect_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    def record(self, trace: RequestTrace):
+        """Finish a trace and keep it if it is one of the slowest."""
+        trace.stop("total")
+        if trace.total is None:
+            return
+
+        if trace.total > self._slow_threshold:
+            _LOGGER.warning(
+                "Slow request to %s (station %s): %.2fs %s",
+                trace.end_point,
+                trace.station_id,
+                trace.total,
+                trace.as_dict(),
+            )
+
+        self._expire()
+        item = (trace.total, next(self._counter), trace)
+        if len(self._slowest) < self._max_traces:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    def slowest(self) -> list[dict[str, Any]]:
+        """Return the slowest recent traces, slowest first."""
+        self._expire()
+        return [trace.as_dict() for _, _, trace in sorted(self._slowest, reverse=True)]
+
+    def _expire(self):
+        """Drop the traces older than the maximum age."""
+        oldest = time.time() - self._max_age
+        if any(trace.started < oldest for _, _, trace in self._slowest):
+            self._slowest = [item for item in self._slowest if item[2].started >= oldest]
+            heapq.heapify(self._slowest)
+
+    @staticmethod
+    def _trace(ctx: SimpleNamespace) -> RequestTrace | None:
+        trace = ctx.trace_request_ctx
+        return trace if isinstance(trace, RequestTrace) else None
+
+    async def _on_dns_start(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.start("dns")
+
+    async def _on_dns_end(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.stop("dns")
+
+    async def _on_connect_start(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.start("connect")
+
+    async def _on_connect_end(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.stop("connect")
+            trace.start("first_byte")
+
+    async def _on_connection_reuse(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.reused_connection = True
+            trace.start("first_byte")
+
+    async def _on_request_end(self, session: ClientSession, ctx: SimpleNamespace, params):
+        if trace := self._trace(ctx):
+            trace.stop("first_byte")
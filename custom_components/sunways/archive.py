@@ -0,0 +1,160 @@
+"""Compact archive of raw readings in a memory-mapped ring file."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Mapping
+import math
+import mmap
+import os
+import struct
+import threading
+
+_MAGIC = b"SWRA"
+_VERSION = 1
+# magic, version, number of fields, capacity, head, count
+_HEADER = struct.Struct("<4sHHIII")
+_HEADER_SIZE = 32
+
+# Number of records kept. The polls follow the portal's update cadence, so
+# the time span covered varies: a week at one poll per minute, less while
+# the schedule probes for updates, more once its polls are aligned
+ARCHIVE_CAPACITY = 7 * 24 * 60
+
+
+def remove_archive(path: str):
+    """Delete an archive file, if there is one."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ReadingArchive:
+    """Fixed size ring of timestamped readings, backed by a memory-mapped file.
+
+    Each record is a timestamp followed by one float64 per field, so a range
+    of records can be returned as flat arrays without parsing every value.
+    Opening, appending and querying do file I/O; run them in the executor.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: Iterable[str],
+        capacity: int = ARCHIVE_CAPACITY
+    ):
+        self._fields = tuple(fields)
+        self._stride = len(self._fields) + 1
+        self._record = struct.Struct(f"<{self._stride}d")
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._closed = False
+
+        size = _HEADER_SIZE + capacity * self._record.size
+        self._file = open(path, "a+b")  # noqa: SIM115
+        reuse = os.fstat(self._file.fileno()).st_size == size
+        if not reuse:
+            self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        magic, version, fields_count, file_capacity, head, count = _HEADER.unpack_from(self._mmap)
+        if reuse and (magic, version, fields_count, file_capacity) == (
+            _MAGIC, _VERSION, len(self._fields), capacity
+        ):
+            self._head = head
+            self._count = count
+        else:
+            self._head = 0
+            self._count = 0
+            self._write_header()
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        """Names of the archived values, in record order."""
+        return self._fields
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """Flush and close the archive file."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+
+    def append(self, timestamp: float, values: Mapping[str, float | None]):
+        """Store a reading, overwriting the oldest one when full."""
+        record = [timestamp]
+        for field in self._fields:
+            value = values.get(field)
+            record.append(math.nan if value is None else float(value))
+
+        with self._lock:
+            if self._closed:
+                return
+            self._record.pack_into(self._mmap, self._offset(self._head), *record)
+            self._head = (self._head + 1) % self._capacity
+            self._count = min(self._count + 1, self._capacity)
+            self._write_header()
+
+    def query(self, start: float, end: float) -> dict[str, array]:
+        """Return the readings between the timestamps (inclusive), per column.
+
+        The result holds a 'time' column and one column per field, as float64
+        arrays which can be wrapped with numpy.frombuffer without a copy.
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("Archive is closed")
+            first = self._search(start, inclusive=True)
+            last = self._search(end, inclusive=False)
+
+            records = array("d")
+            if last > first:
+                begin = self._physical(first)
+                stop = begin + (last - first)
+                if stop <= self._capacity:
+                    records.frombytes(self._mmap[self._offset(begin):self._offset(stop)])
+                else:
+                    records.frombytes(self._mmap[self._offset(begin):])
+                    records.frombytes(
+                        self._mmap[_HEADER_SIZE:self._offset(stop - self._capacity)]
+                    )
+
+        result = {"time": records[0::self._stride]}
+        for index, field in enumerate(self._fields, start=1):
+            result[field] = records[index::self._stride]
+        return result
+
+    def _write_header(self):
+        _HEADER.pack_into(
+            self._mmap, 0,
+            _MAGIC, _VERSION, len(self._fields), self._capacity, self._head, self._count
+        )
+
+    def _offset(self, physical: int) -> int:
+        return _HEADER_SIZE + physical * self._record.size
+
+    def _physical(self, logical: int) -> int:
+        """Map the n-th oldest reading to its slot in the ring."""
+        return (self._head - self._count + logical) % self._capacity
+
+    def _timestamp(self, logical: int) -> float:
+        return struct.unpack_from("<d", self._mmap, self._offset(self._physical(logical)))[0]
+
+    def _search(self, timestamp: float, inclusive: bool) -> int:
+        """Binary search the first reading after (or at) the timestamp."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._timestamp(middle)
+            if current < timestamp or (not inclusive and current == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -9,13 +9,25 @@ from types import MappingProxyType
 from typing import Any, NamedTuple
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_PASSWORD, CONF_EMAIL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, CONF_STATION_ID, CONF_INITIAL_TOKEN
+from .const import (
+    DOMAIN,
+    CONF_STATION_ID,
+    CONF_INITIAL_TOKEN,
+    CONF_HEDGE_REQUESTS,
+    CONF_TRACE_REQUESTS,
+    CONF_ARCHIVE_READINGS,
+    CONF_AGGREGATION_WINDOW,
+)
 from .api.client import SunwaysClient, SunwaysStation
 from .api.connection import TokenJar
 from .api.exceptions import ConnectionFailed, LoginFailed, SunwaysClientException
@@ -34,20 +46,27 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 
 async def create_sunways_client(
     hass: HomeAssistant,
-    data: MappingProxyType[str, Any]
+    data: MappingProxyType[str, Any],
+    options: Mapping[str, Any] | None = None
 ) -> SunwaysClient:
-    """Create a Sunways client API for the given config entry."""
+    """Create a Sunways client API for the given config entry.
+
+    The client owns a dedicated, tuned web session; close it when done.
+    """
 
     email = data[CONF_EMAIL]
     password = data[CONF_PASSWORD]
 
-    websession = async_get_clientsession(hass, verify_ssl=True)
     token_jar = None
 
     if CONF_INITIAL_TOKEN in data:
         token_jar = TokenJar(data[CONF_INITIAL_TOKEN], time.time())
 
-    return SunwaysClient(email, password, websession, token_jar)
+    options = options or {}
+    hedge_requests = options.get(CONF_HEDGE_REQUESTS, False)
+    trace_requests = options.get(CONF_TRACE_REQUESTS, False)
+
+    return SunwaysClient(email, password, None, token_jar, hedge_requests, trace_requests)
 
 
 class UserInfo(NamedTuple):
@@ -60,8 +79,11 @@ async def _validate_input(hass: HomeAssistant, data: dict[str, Any]) -> UserInfo
     """Validate the user input allows us to connect."""
 
     client = await create_sunways_client(hass, MappingProxyType(data))
-    stations = await client.get_stations()
-    
+    try:
+        stations = await client.get_stations()
+    finally:
+        await client.close()
+
     return UserInfo(stations)
 
 
@@ -70,6 +92,12 @@ class SunwaysConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return SunwaysOptionsFlow(config_entry)
+
     def __init__(self) -> None:
         """Create the config flow for a new integration."""
         self._config_data: dict[str, Any] = {}
@@ -184,3 +212,42 @@ class SunwaysConfigFlow(ConfigFlow, domain=DOMAIN):
             _LOGGER.exception("Unexpected exception")
             errors["base"] = "unknown"
         return None
+
+
+class SunwaysOptionsFlow(OptionsFlow):
+    """Handle the options of a Sunways config entry."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._options = dict(config_entry.options)
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+
+        if user_input is not None:
+            self._options.update(user_input)
+            return self.async_create_entry(title="", data=self._options)
+
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_HEDGE_REQUESTS,
+                    default=self._options.get(CONF_HEDGE_REQUESTS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_TRACE_REQUESTS,
+                    default=self._options.get(CONF_TRACE_REQUESTS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_ARCHIVE_READINGS,
+                    default=self._options.get(CONF_ARCHIVE_READINGS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_AGGREGATION_WINDOW,
+                    default=self._options.get(CONF_AGGREGATION_WINDOW, 0),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
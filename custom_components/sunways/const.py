@@ -12,6 +12,10 @@ MANUFACTURER = "Sunways"
 
 CONF_STATION_ID = "station_id"
 CONF_INITIAL_TOKEN = "initial_token"
+CONF_HEDGE_REQUESTS = "hedge_requests"
+CONF_TRACE_REQUESTS = "trace_requests"
+CONF_ARCHIVE_READINGS = "archive_readings"
+CONF_AGGREGATION_WINDOW = "aggregation_window"
 
 class Units(StrEnum):
     """Available sensor units."""
@@ -1,21 +1,46 @@
 """Update coordinatior for the Sunways integration."""
 
-from datetime import timedelta
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from enum import StrEnum
 import logging
 import asyncio
+import math
+import time
+from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later, async_track_time_change
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
 from .api.client import SunwaysClient, SunwaysStationOverview
+from .api.connection import (
+    API_STATION_OVERVIEW,
+    AUTH_TIMEOUT,
+    CONNECT_TIMEOUT,
+    KEEPALIVE_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
 from .api.exceptions import SunwaysClientException
-from .const import SensorKeys
+from .archive import ReadingArchive
+from .const import DOMAIN, SENSOR_DESCRIPTIONS, SensorKeys
+from .phase import PhaseLockedSchedule
+from .profiler import RefreshProfiler
 
 SCAN_INTERVAL = timedelta(seconds=60)
 
+# Upper bound for a whole update, the sum of the client's per-phase budgets
+UPDATE_TIMEOUT = AUTH_TIMEOUT + REQUEST_TIMEOUT
+
 
 def convert_to_kilo(value: float | None, unit: str) -> float:
     if value is None:
@@ -36,6 +61,137 @@ def convert_to_mega(value: float | None, unit: str) -> float:
     return round(value / 1000 / 1000, 2)
 
 
+class RefreshTier(StrEnum):
+    """Volatility of the sensors, each tier notifies its entities on its own schedule."""
+
+    STATIC = "static"
+    SLOW = "slow"
+    LIVE = "live"
+
+
+# Minimal age before the entities of a tier are notified again; live sensors
+# are notified with every poll
+TIER_INTERVALS: dict[RefreshTier, timedelta] = {
+    RefreshTier.STATIC: timedelta(hours=24),
+    RefreshTier.SLOW: timedelta(minutes=5),
+    RefreshTier.LIVE: timedelta(0),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SensorSource:
+    """Endpoint backing a sensor, and how to read the sensor from its response."""
+
+    endpoint: str
+    convert: Callable[[Any], float]
+    tier: RefreshTier = RefreshTier.LIVE
+
+
+# Fetchers per endpoint, called with the client and the station id
+ENDPOINT_FETCHERS: dict[str, Callable[[SunwaysClient, str], Awaitable[Any]]] = {
+    API_STATION_OVERVIEW: SunwaysClient.get_station_overview,
+}
+
+SENSOR_SOURCES: dict[SensorKeys, SensorSource] = {
+    SensorKeys.SOLAR_POWER: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.solar_power, o.solar_power_unit),
+    ),
+    SensorKeys.INSTALLED_POWER: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.installed_power, o.installed_power_unit),
+        RefreshTier.STATIC,
+    ),
+    SensorKeys.EFFICIENCY: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: o.solar_installed_ratio if o.solar_installed_ratio else 0.0,
+    ),
+    SensorKeys.LOAD_POWER: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.load_power, o.load_power_unit),
+    ),
+    SensorKeys.GRID_POWER_CONSUMPTION: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.grid_power_consumption, o.grid_power_unit),
+    ),
+    SensorKeys.GRID_POWER_RETURN: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.grid_power_return, o.grid_power_unit),
+    ),
+    SensorKeys.DAILY_GENERATION: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.daily_generation, o.daily_generation_unit),
+        RefreshTier.SLOW,
+    ),
+    SensorKeys.MONTHLY_GENERATION: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_kilo(o.monthly_generation, o.monthly_generation_unit),
+        RefreshTier.SLOW,
+    ),
+    SensorKeys.YEARLY_GENERATION: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_mega(o.yearly_generation, o.yearly_generation_unit),
+        RefreshTier.SLOW,
+    ),
+    SensorKeys.TOTAL_GENERATION: SensorSource(
+        API_STATION_OVERVIEW,
+        lambda o: convert_to_mega(o.total_generation, o.total_generation_unit),
+        RefreshTier.SLOW,
+    ),
+}
+
+
+# Sensors which can be averaged over an aggregation window
+AGGREGATED_KEYS = [
+    key for key, description in SENSOR_DESCRIPTIONS.items()
+    if description.state_class == SensorStateClass.MEASUREMENT
+]
+
+
+@dataclass(slots=True)
+class WindowStats:
+    """Streaming time-weighted mean, minimum and maximum of the samples in a window.
+
+    Each sample is weighted by the time until the next one, so bursts of
+    polls do not over-count the values they repeat.
+    """
+
+    samples: int = 0
+    min: float = math.inf
+    max: float = -math.inf
+    _weighted_sum: float = 0.0
+    _duration: float = 0.0
+    _value: float | None = None
+    _time: float = 0.0
+
+    def add(self, value: float, now: float):
+        """Add a sample taken at the given monotonic time."""
+        self.hold_until(now)
+        self._value = value
+        self.samples += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def hold_until(self, now: float):
+        """Count the latest value as held up to the given monotonic time."""
+        if self._value is not None:
+            elapsed = now - self._time
+            self._weighted_sum += self._value * elapsed
+            self._duration += elapsed
+        self._time = now
+
+    @property
+    def mean(self) -> float:
+        """Mean of the values held up to the latest sample, or the window end."""
+        if self._duration > 0:
+            return self._weighted_sum / self._duration
+        return self._value if self._value is not None else 0.0
+
+    def as_attributes(self) -> dict[str, float]:
+        """Statistics exposed as state attributes."""
+        return {"min": self.min, "max": self.max, "samples": self.samples}
+
+
 class SunwaysStationOverviewUpdateCoordinator(DataUpdateCoordinator[SunwaysStationOverview]):
     """Coordinator for getting details about the station."""
 
@@ -44,7 +200,9 @@ class SunwaysStationOverviewUpdateCoordinator(DataUpdateCoordinator[SunwaysStati
         hass: HomeAssistant,
         logger: logging.Logger,
         client: SunwaysClient,
-        station_id: str
+        station_id: str,
+        archive: ReadingArchive | None = None,
+        aggregation_window: timedelta | None = None
     ) -> None:
         """Initialize my coordinator."""
         super().__init__(
@@ -55,28 +213,238 @@ class SunwaysStationOverviewUpdateCoordinator(DataUpdateCoordinator[SunwaysStati
         )
         self._client = client
         self._station_id = station_id
+        self._archive = archive
+        self._schedule = PhaseLockedSchedule(SCAN_INTERVAL.total_seconds())
+        self._last_readings: dict[SensorKeys, float] | None = None
+        self._tier_refreshed: dict[RefreshTier, float] = {}
+        self._tier_day: date | None = None
+        self._readings: dict[SensorKeys, float] = {}
+        self.updated_keys: set[SensorKeys] = set()
+        # The daily counter resets at midnight, refresh it right away
+        self._unsub_day_rollover = async_track_time_change(
+            hass, self._async_day_rollover, hour=0, minute=1, second=0
+        )
+        self._aggregation_window = aggregation_window
+        self._window: dict[SensorKeys, WindowStats] = {}
+        self._window_start: float | None = None
+        self._published: dict[SensorKeys, float] = {}
+        self._published_stats: dict[SensorKeys, dict[str, float]] = {}
+        self._profiler: RefreshProfiler | None = None
+        self._profiling: RefreshProfiler | None = None
+        self._unsub_warm_up: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start_profiling(self, profiler: RefreshProfiler) -> None:
+        """Profile the next refreshes, up to the state writes of the entities."""
+        self._profiler = profiler
+
+    async def async_refresh_tier(self, tier: RefreshTier) -> None:
+        """Update the entities of a tier with the next poll, and request it now."""
+        self._tier_refreshed.pop(tier, None)
+        await self.async_request_refresh()
+
+    async def _async_day_rollover(self, now: datetime) -> None:
+        await self.async_refresh_tier(RefreshTier.SLOW)
+
+    async def async_shutdown(self) -> None:
+        """Cancel scheduled refreshes and stop profiling."""
+        await super().async_shutdown()
+        self._unsub_day_rollover()
+        self._cancel_warm_up()
+        self._profiler = None
+
+    @callback
+    def _schedule_warm_up(self, delay: float) -> None:
+        """Reopen the connection just before the next poll, if it is idle past the keep-alive."""
+        self._cancel_warm_up()
+        if delay > KEEPALIVE_TIMEOUT:
+            self._unsub_warm_up = async_call_later(
+                self.hass, delay - CONNECT_TIMEOUT, self._async_warm_up
+            )
+
+    @callback
+    def _cancel_warm_up(self) -> None:
+        if self._unsub_warm_up:
+            self._unsub_warm_up()
+            self._unsub_warm_up = None
+
+    async def _async_warm_up(self, now: datetime) -> None:
+        self._unsub_warm_up = None
+        await self._client.warm_up()
+
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        """Refresh data and notify the entities, profiled when requested.
+
+        The profiled refresh is ended on every path, including failed
+        refreshes which do not notify the entities.
+        """
+        profiler = self._profiler
+        if profiler is None or not profiler.enable():
+            self._profiler = None
+            await super()._async_refresh(*args, **kwargs)
+            return
+
+        self._profiling = profiler
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            self._profiling = None
+            profiler.disable()
+
+    def _profile_section(self) -> AbstractContextManager[None]:
+        """Profile a CPU-bound part of the current refresh, if it is profiled."""
+        return self._profiling.section() if self._profiling else nullcontext()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the entities, the state writes are profiled."""
+        with self._profile_section():
+            super().async_update_listeners()
+
+    def _aggregate(self, sensors: dict[SensorKeys, float]) -> dict[SensorKeys, float]:
+        """Collect the measurements, and publish their statistics once per window.
+
+        Between windows the published values stay the same, so the entities
+        do not record a new state for every sample.
+        """
+        now = time.monotonic()
+        window = self._aggregation_window.total_seconds()
+        if self._window_start is not None and now - self._window_start >= window:
+            # Close the window before the new sample, which was not held in it
+            for stats in self._window.values():
+                stats.hold_until(now)
+            self._publish_window()
+            self._window = {}
+            self._window_start = None
+
+        if self._window_start is None:
+            self._window_start = now
+        for key in AGGREGATED_KEYS:
+            if key in sensors:
+                self._window.setdefault(key, WindowStats()).add(sensors[key], now)
+
+        # Publish the first sample right away, so the entities have a state
+        if not self._published:
+            self._publish_window()
+
+        return {**sensors, **self._published}
+
+    def _publish_window(self):
+        self._published = {key: round(stats.mean, 3) for key, stats in self._window.items()}
+        self._published_stats = {key: stats.as_attributes() for key, stats in self._window.items()}
+
+    def _due_tiers(self, now: float) -> set[RefreshTier]:
+        """Tiers which are due for a refresh."""
+        today = dt_util.now().date()
+        if today != self._tier_day:
+            self._tier_day = today
+            self._tier_refreshed.pop(RefreshTier.SLOW, None)
+
+        return {
+            tier
+            for tier, interval in TIER_INTERVALS.items()
+            if (refreshed := self._tier_refreshed.get(tier)) is None
+            or now - refreshed >= interval.total_seconds()
+        }
+
+    def _fetch_plan(self, tiers: set[RefreshTier]) -> dict[str, list[SensorKeys]]:
+        """Group the sensors of enabled entities by the endpoint backing them.
+
+        Sensors without a registry entry yet are planned, as new entities are
+        enabled by default. Only endpoints backing a due, enabled sensor are
+        fetched; all enabled sensors of a fetched endpoint are read from it,
+        as the response holds them anyway.
+        """
+        registry = er.async_get(self.hass)
+        plan: dict[str, list[SensorKeys]] = {}
+        due: set[str] = set()
+        for key, source in SENSOR_SOURCES.items():
+            uid = f"{self._station_id}-{key}"
+            entity_id = registry.async_get_entity_id(Platform.SENSOR, DOMAIN, uid)
+            if entity_id and registry.async_get(entity_id).disabled:
+                continue
+            plan.setdefault(source.endpoint, []).append(key)
+            if source.tier in tiers:
+                due.add(source.endpoint)
+        return {endpoint: keys for endpoint, keys in plan.items() if endpoint in due}
 
     async def _async_update_data(self):
         """Fetch data from API endpoint."""
+        try:
+            data = await self._async_fetch_data()
+        except BaseException:
+            # Any failure, also timeouts and malformed responses: poll again
+            # at the fixed interval, the schedule keeps a lock it has
+            self._cancel_warm_up()
+            self.update_interval = timedelta(seconds=self._schedule.failed())
+            raise
 
+        self._schedule_warm_up(self.update_interval.total_seconds())
+        return data
+
+    async def _async_fetch_data(self):
+        now = time.monotonic()
+        tiers = self._due_tiers(now)
+        plan = self._fetch_plan(tiers)
+        responses = {}
         try:
-            async with asyncio.timeout(10):
-                overview = await self._client.get_station_overview(self._station_id)
-
-                return {
-                    'id': self._station_id,
-                    'sensors': {
-                        SensorKeys.SOLAR_POWER: convert_to_kilo(overview.solar_power, overview.solar_power_unit),
-                        SensorKeys.INSTALLED_POWER: convert_to_kilo(overview.installed_power, overview.installed_power_unit),
-                        SensorKeys.EFFICIENCY: overview.solar_installed_ratio if overview.solar_installed_ratio else 0.0,
-                        SensorKeys.LOAD_POWER: convert_to_kilo(overview.load_power, overview.load_power_unit),
-                        SensorKeys.GRID_POWER_CONSUMPTION: convert_to_kilo(overview.grid_power_consumption, overview.grid_power_unit),
-                        SensorKeys.GRID_POWER_RETURN: convert_to_kilo(overview.grid_power_return, overview.grid_power_unit),
-                        SensorKeys.DAILY_GENERATION: convert_to_kilo(overview.daily_generation, overview.daily_generation_unit),
-                        SensorKeys.MONTHLY_GENERATION: convert_to_kilo(overview.monthly_generation, overview.monthly_generation_unit),
-                        SensorKeys.YEARLY_GENERATION: convert_to_mega(overview.yearly_generation, overview.yearly_generation_unit),
-                        SensorKeys.TOTAL_GENERATION: convert_to_mega(overview.total_generation, overview.total_generation_unit)
-                    }
-                }
+            async with asyncio.timeout(UPDATE_TIMEOUT):
+                for endpoint in plan:
+                    responses[endpoint] = await ENDPOINT_FETCHERS[endpoint](self._client, self._station_id)
         except SunwaysClientException as err:
             raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        for tier in tiers:
+            self._tier_refreshed[tier] = now
+
+        # Only the CPU-bound part is profiled, not the waits for the network
+        with self._profile_section():
+            data = self._update_readings(now, tiers, plan, responses)
+
+        if self._archive:
+            await self.hass.async_add_executor_job(self._archive.append, time.time(), data['readings'])
+
+        return data
+
+    def _update_readings(
+        self,
+        now: float,
+        tiers: set[RefreshTier],
+        plan: dict[str, list[SensorKeys]],
+        responses: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Convert the responses, and schedule the next poll."""
+        fresh = {
+            key: SENSOR_SOURCES[key].convert(responses[endpoint])
+            for endpoint, keys in plan.items()
+            for key in keys
+        }
+        # The readings are always kept fresh, but entities are only notified
+        # when their tier is due, or all of them when recovering from a failed update
+        if self.last_update_success:
+            self.updated_keys = {key for key in fresh if SENSOR_SOURCES[key].tier in tiers}
+        else:
+            self.updated_keys = set(SENSOR_SOURCES)
+        self._readings = sensors = {**self._readings, **fresh}
+
+        # Align the next poll to the portal's own update cadence
+        live = {key: value for key, value in fresh.items() if SENSOR_SOURCES[key].tier is RefreshTier.LIVE}
+        changed = self._last_readings is not None and live != self._last_readings
+        self._last_readings = live
+        delay = self._schedule.observe(now, changed)
+        self.update_interval = timedelta(seconds=delay)
+
+        # The entities show the window means, the raw readings are kept as well
+        if self._aggregation_window:
+            return {
+                'id': self._station_id,
+                'sensors': self._aggregate(sensors),
+                'readings': sensors,
+                'aggregates': self._published_stats
+            }
+
+        return {
+            'id': self._station_id,
+            'sensors': sensors,
+            'readings': sensors
+        }
@@ -0,0 +1,30 @@
+"""Diagnostics support for the Sunways integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from . import SunwaysConfigEntry
+from .const import CONF_INITIAL_TOKEN
+
+TO_REDACT = {CONF_EMAIL, CONF_PASSWORD, CONF_INITIAL_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: SunwaysConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = entry.runtime_data
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator_data": runtime_data.coordinator.data,
+        "request_traces": runtime_data.client.request_traces,
+    }
@@ -0,0 +1,125 @@
+"""OpenMetrics exposition of the Sunways stations and API clients."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import PERCENTAGE, UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, SENSOR_DESCRIPTIONS, SensorKeys
+from .coordinator import AGGREGATED_KEYS
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_UNIT_SUFFIXES = {
+    UnitOfPower.KILO_WATT: "kilowatts",
+    UnitOfEnergy.KILO_WATT_HOUR: "kilowatt_hours",
+    UnitOfEnergy.MEGA_WATT_HOUR: "megawatt_hours",
+    PERCENTAGE: "percent",
+}
+
+# Statistics of the aggregation window, exported next to the raw readings
+WINDOW_STATS = ("mean", "min", "max")
+
+SENSOR_FAMILIES: dict[SensorKeys, str] = {
+    key: f"{DOMAIN}_{key}_{_UNIT_SUFFIXES[description.native_unit_of_measurement]}"
+    for key, description in SENSOR_DESCRIPTIONS.items()
+}
+
+WINDOW_FAMILIES: dict[tuple[SensorKeys, str], str] = {
+    (key, stat): f"{DOMAIN}_{key}_window_{stat}_"
+    f"{_UNIT_SUFFIXES[SENSOR_DESCRIPTIONS[key].native_unit_of_measurement]}"
+    for key in AGGREGATED_KEYS
+    for stat in WINDOW_STATS
+}
+
+_HEADERS = {
+    family: f"# TYPE {family} gauge\n"
+    for family in [*SENSOR_FAMILIES.values(), *WINDOW_FAMILIES.values()]
+}
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SunwaysMetricsView(HomeAssistantView):
+    """Serves the latest readings of all stations and the client counters.
+
+    The raw readings are served even when the entities show window means;
+    the window statistics are separate series. The sample lines of a station
+    are rendered once per coordinator update, and reused by the scrapes
+    until its data changes.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self._hass = hass
+        # Per station: the coordinator data rendered, and its sample line per family
+        self._cache: dict[str, tuple[Any, dict[str, str]]] = {}
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Render the metrics."""
+        entries = [
+            entry
+            for entry in self._hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+        ]
+
+        stations = []
+        for entry in entries:
+            data = entry.runtime_data.coordinator.data
+            if data is None:
+                continue
+            station = _label(data['id'])
+            cached = self._cache.get(station)
+            if cached is None or cached[0] is not data:
+                cached = (data, self._render_station(station, data))
+                self._cache[station] = cached
+            stations.append((station, cached[1], entry.runtime_data.client.metrics))
+
+        # Forget stations which are no longer loaded
+        if len(self._cache) > len(stations):
+            loaded = {station for station, _, _ in stations}
+            self._cache = {k: v for k, v in self._cache.items() if k in loaded}
+
+        parts: list[str] = []
+        for family, header in _HEADERS.items():
+            parts.append(header)
+            parts.extend(lines[family] for _, lines, _ in stations if family in lines)
+
+        if stations:
+            for name in stations[0][2]:
+                family = f"{DOMAIN}_api_{name}"
+                parts.append(f"# TYPE {family} counter\n")
+                parts.extend(
+                    f'{family}_total{{station="{station}"}} {metrics[name]}\n'
+                    for station, _, metrics in stations
+                )
+
+        parts.append("# EOF\n")
+        return web.Response(body="".join(parts).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    @staticmethod
+    def _render_station(station: str, data: dict[str, Any]) -> dict[str, str]:
+        samples = {
+            SENSOR_FAMILIES[key]: value for key, value in data['readings'].items()
+        }
+        for key, stats in data.get('aggregates', {}).items():
+            window = {"mean": data['sensors'].get(key), **stats}
+            for stat in WINDOW_STATS:
+                samples[WINDOW_FAMILIES[key, stat]] = window.get(stat)
+
+        return {
+            family: f'{family}{{station="{station}"}} {value}\n'
+            for family, value in samples.items()
+            if value is not None
+        }
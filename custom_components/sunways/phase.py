@@ -0,0 +1,244 @@
+"""Polling aligned to the update cadence of the Sunways portal."""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+import statistics
+
+# Coarse update windows used for a first guess of the period
+PHASE_HISTORY = 8
+PHASE_MIN_UPDATES = 3
+# Only lock on periods of at least this many poll intervals; shorter ones
+# can not be told apart from aliases of the poll interval
+PHASE_MIN_PERIOD_FACTOR = 2.0
+# Interval of the probe polls which time an update precisely
+PHASE_PROBE_INTERVAL = 10.0
+# Probe polls before the learning is given up
+PHASE_MAX_PROBE_POLLS = 60
+# Precise updates needed, their periods must agree within the tolerance
+PHASE_MIN_TIGHT_UPDATES = 3
+PHASE_PERIOD_TOLERANCE = 2 * PHASE_PROBE_INTERVAL
+# Fixed interval polling after the learning failed, before trying again;
+# doubles with every failure
+PHASE_RELEARN_DELAY = 60 * 60
+PHASE_MAX_RELEARN_DELAY = 24 * 60 * 60
+# Poll this long after the expected upstream update
+PHASE_MARGIN = 5.0
+# Every few hits a poll is made this much before the expected update, to
+# time the update precisely again; doubling while those polls still hit, so
+# a faster upstream period is caught up with
+PHASE_VERIFY_EVERY = 4
+PHASE_VERIFY_STEP = 10.0
+PHASE_MAX_VERIFY_DOUBLINGS = 6
+# After polling too early, poll again this much later
+PHASE_RETRY_DELAY = 10.0
+PHASE_MAX_MISSES = 3
+PHASE_MIN_DELAY = 5.0
+# Weight of a new measurement when refining the period while locked
+PHASE_PERIOD_GAIN = 0.2
+
+
+class PhaseLockedSchedule:
+    """Learns when the portal updates the station data, and when to poll next.
+
+    A poll which sees changed data tells that an upstream update happened
+    since the previous poll. At the fixed interval these windows are as wide
+    as the interval, which only gives a coarse guess of the period. Around
+    the next expected updates the schedule then probes at a short interval,
+    timing the updates precisely. Once consecutive precise periods agree,
+    each poll is scheduled just after the next expected update.
+
+    While locked, a poll which is too early is retried shortly after, which
+    times the update precisely and corrects the phase and period. Every few
+    hits a poll is made deliberately early for the same purpose, so the
+    schedule follows drift either way. Too many misses in a row drop the
+    lock and fall back to the fixed interval.
+
+    Times are in seconds on any monotonic clock.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Initialize the schedule with the fixed fallback interval."""
+        self._interval = interval
+        self._last_poll: float | None = None
+        self._relearn_at = 0.0
+        self._relearn_delay = PHASE_RELEARN_DELAY
+        # Learning
+        self._windows: deque[float] = deque(maxlen=PHASE_HISTORY)
+        self._coarse_period: float | None = None
+        self._probe_start: float | None = None
+        self._probe_polls = 0
+        self._tight: deque[float] = deque(maxlen=PHASE_MIN_TIGHT_UPDATES)
+        # Locked
+        self._period: float | None = None
+        self._expected: float | None = None
+        self._last_tight: float | None = None
+        self._misses = 0
+        self._hits = 0
+        self._verify_step: float | None = None
+
+    @property
+    def locked(self) -> bool:
+        """Whether polls are aligned to the upstream updates."""
+        return self._expected is not None
+
+    @property
+    def period(self) -> float | None:
+        """The learned upstream update period, if locked."""
+        return self._period if self.locked else None
+
+    def observe(self, now: float, changed: bool) -> float:
+        """Record a poll and whether its data changed, return the delay to the next poll."""
+        previous, self._last_poll = self._last_poll, now
+        if previous is None:
+            if self._expected is not None:
+                # Resuming after a failed poll: align to the next expected update
+                if now > self._expected:
+                    self._expected += math.ceil((now - self._expected) / self._period) * self._period
+                return max(self._expected + PHASE_MARGIN - now, PHASE_MIN_DELAY)
+            return self._interval
+
+        if self._expected is not None:
+            return self._track(previous, now, changed)
+        if self._coarse_period is not None:
+            return self._probe(previous, now, changed)
+        return self._learn(previous, now, changed)
+
+    def failed(self) -> float:
+        """Record a failed poll, return the delay to the next poll.
+
+        The poll after a failure has nothing to compare against, so it only
+        starts observing again. A lock is kept, the learning starts over.
+        """
+        self._last_poll = None
+        self._misses = 0
+        self._hits = 0
+        self._verify_step = None
+        if self._expected is None:
+            self._windows.clear()
+            self._coarse_period = None
+            self._probe_start = None
+            self._tight.clear()
+        return self._interval
+
+    def _learn(self, previous: float, now: float, changed: bool) -> float:
+        """Collect update windows at the fixed interval for a coarse period."""
+        if not changed or now < self._relearn_at:
+            return self._interval
+
+        self._windows.append((previous + now) / 2)
+        if len(self._windows) < PHASE_MIN_UPDATES:
+            return self._interval
+
+        windows = list(self._windows)
+        period = statistics.median(b - a for a, b in zip(windows, windows[1:]))
+        # The coarse period is off by up to an interval
+        if period + self._interval < self._interval * PHASE_MIN_PERIOD_FACTOR:
+            return self._interval
+
+        self._coarse_period = period
+        self._probe_polls = 0
+        self._tight.clear()
+        # The update happened after the previous poll
+        return self._probe_next(previous + period, now)
+
+    def _probe(self, previous: float, now: float, changed: bool) -> float:
+        """Time the updates precisely by polling around them at a short interval."""
+        self._probe_polls += 1
+        if self._probe_polls > PHASE_MAX_PROBE_POLLS:
+            self._reset(relearn=True)
+            return self._interval
+
+        probing = self._probe_start is not None and now >= self._probe_start
+        if not changed:
+            return PHASE_PROBE_INTERVAL if probing else self._interval
+
+        if not probing or now - previous > PHASE_PROBE_INTERVAL * 1.5:
+            # Updated before the probing started, start earlier around the next one
+            self._tight.clear()
+            return self._probe_next(previous + self._coarse_period, now)
+
+        update = (previous + now) / 2
+        self._tight.append(update)
+        if len(self._tight) < 2:
+            return self._probe_next(update + self._coarse_period, now)
+
+        tight = list(self._tight)
+        periods = [b - a for a, b in zip(tight, tight[1:])]
+        if len(tight) < PHASE_MIN_TIGHT_UPDATES or max(periods) - min(periods) > PHASE_PERIOD_TOLERANCE:
+            return self._probe_next(update + periods[-1], now)
+
+        period = (tight[-1] - tight[0]) / (len(tight) - 1)
+        if period < self._interval * PHASE_MIN_PERIOD_FACTOR:
+            self._reset(relearn=True)
+            return self._interval
+
+        self._period = period
+        self._expected = update + period
+        self._last_tight = update
+        self._relearn_delay = PHASE_RELEARN_DELAY
+        return max(self._expected + PHASE_MARGIN - now, PHASE_MIN_DELAY)
+
+    def _probe_next(self, expected: float, now: float) -> float:
+        """Wait until shortly before an expected update, then probe."""
+        self._probe_start = expected - self._interval
+        return max(self._probe_start - now, PHASE_PROBE_INTERVAL)
+
+    def _track(self, previous: float, now: float, changed: bool) -> float:
+        """Poll just after the expected updates, following drift."""
+        if not changed:
+            # Polled before the upstream update, it happens after now
+            self._misses += 1
+            self._verify_step = None
+            if self._misses > PHASE_MAX_MISSES:
+                self._reset(relearn=False)
+                return self._interval
+            return PHASE_RETRY_DELAY
+
+        if self._misses:
+            # The update happened between the miss and now: correct the phase
+            update = (previous + now) / 2
+            self._refine_period(update)
+            self._expected = update + self._period
+            self._misses = 0
+            self._hits = 0
+            return max(self._expected + PHASE_MARGIN - now, PHASE_MIN_DELAY)
+
+        self._expected += self._period
+        self._hits += 1
+        if self._verify_step is not None:
+            # Still before the update: it drifted earlier, verify earlier yet
+            self._verify_step = min(
+                self._verify_step * 2, PHASE_VERIFY_STEP * 2 ** PHASE_MAX_VERIFY_DOUBLINGS
+            )
+        elif self._hits % PHASE_VERIFY_EVERY == 0:
+            self._verify_step = PHASE_VERIFY_STEP
+
+        if self._verify_step is not None:
+            return max(self._expected - self._verify_step - now, PHASE_MIN_DELAY)
+        return max(self._expected + PHASE_MARGIN - now, PHASE_MIN_DELAY)
+
+    def _refine_period(self, update: float) -> None:
+        if self._last_tight is not None:
+            cycles = round((update - self._last_tight) / self._period)
+            if cycles >= 1:
+                measured = (update - self._last_tight) / cycles
+                self._period += PHASE_PERIOD_GAIN * (measured - self._period)
+        self._last_tight = update
+
+    def _reset(self, relearn: bool) -> None:
+        """Go back to the fixed interval, and learn again (later, if relearn)."""
+        if relearn and self._last_poll is not None:
+            self._relearn_at = self._last_poll + self._relearn_delay
+            self._relearn_delay = min(self._relearn_delay * 2, PHASE_MAX_RELEARN_DELAY)
+        self._windows.clear()
+        self._coarse_period = None
+        self._probe_start = None
+        self._tight.clear()
+        self._expected = None
+        self._period = None
+        self._last_tight = None
+        self._misses = 0
+        self._hits = 0
+        self._verify_step = None
@@ -0,0 +1,79 @@
+"""On-demand profiling of the coordinator refreshes."""
+
+from __future__ import annotations
+
+import cProfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RefreshProfiler:
+    """Profiles the next coordinator refreshes and writes the stats to a file.
+
+    Only the CPU-bound sections of a refresh are profiled: converting the
+    readings and writing the entity states. The profiler is off while the
+    refresh waits for the network, so other work on the event loop is not
+    recorded. A single profiler is shared by all coordinators.
+    """
+
+    def __init__(self, hass: HomeAssistant, refreshes: int) -> None:
+        """Initialize the profiler for the given number of refreshes."""
+        self._hass = hass
+        self._profile = cProfile.Profile()
+        self._remaining = refreshes
+        self._active = 0
+        self._failed = False
+        self.path = hass.config.path(
+            f"sunways_profile_{datetime.now():%Y%m%d_%H%M%S}.prof"
+        )
+
+    @property
+    def finished(self) -> bool:
+        """Whether all refreshes have been profiled."""
+        return self._remaining <= 0 and self._active == 0
+
+    def enable(self) -> bool:
+        """Start profiling a refresh, returns False if no more are wanted."""
+        if self._remaining <= 0 or self._failed:
+            return False
+        self._remaining -= 1
+        self._active += 1
+        return True
+
+    def disable(self) -> None:
+        """Stop profiling a refresh, and write the stats after the last one."""
+        self._active -= 1
+        if self.finished and not self._failed:
+            self._hass.async_add_executor_job(self._write_stats)
+
+    @contextmanager
+    def section(self) -> Iterator[None]:
+        """Profile a CPU-bound section of a refresh; it must not await."""
+        if self._failed:
+            yield
+            return
+
+        try:
+            self._profile.enable()
+        except ValueError as err:
+            # Another profiler is active, e.g. the one of the profiler integration
+            _LOGGER.warning("Sunways profiling stopped: %s", err)
+            self._failed = True
+            self._remaining = 0
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def _write_stats(self) -> None:
+        self._profile.dump_stats(self.path)
+        _LOGGER.info("Sunways profile written to %s", self.path)
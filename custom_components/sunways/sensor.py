@@ -6,7 +6,7 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -27,11 +27,10 @@ async def async_setup_entry(
     await coordinator.async_config_entry_first_refresh()
 
     station_id = entry.data[CONF_STATION_ID]
-    sensors: dict = coordinator.data['sensors']
     entities: list[InverterSensorEntity] = []
 
-    for sensor_key in sensors.keys():
-        description = SENSOR_DESCRIPTIONS[sensor_key]
+    # Entities for all sensors, as the coordinator only fetches the enabled ones
+    for sensor_key, description in SENSOR_DESCRIPTIONS.items():
 
         uid = f"{station_id}-{sensor_key}"
         entities.append(
@@ -70,7 +69,22 @@ class InverterSensorEntity(CoordinatorEntity, SensorEntity):
             name=f"{MANUFACTURER} {station_name}",
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the tier of this sensor is due."""
+        if (
+            self.coordinator.last_update_success
+            and self.coordinator_context not in self.coordinator.updated_keys
+        ):
+            return
+        super()._handle_coordinator_update()
+
     @property
     def native_value(self):
         """State of this inverter attribute."""
-        return self.coordinator.data['sensors'][self.coordinator_context]
+        return self.coordinator.data['sensors'].get(self.coordinator_context)
+
+    @property
+    def extra_state_attributes(self):
+        """Statistics of the aggregation window, if aggregated."""
+        return self.coordinator.data.get('aggregates', {}).get(self.coordinator_context)
@@ -0,0 +1,45 @@
+"""Services for the Sunways integration."""
+
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import DOMAIN
+from .profiler import RefreshProfiler
+
+SERVICE_PROFILE = "profile"
+ATTR_REFRESHES = "refreshes"
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REFRESHES, default=5): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Sunways services."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next refreshes of all Sunways stations."""
+        entries = [
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+        ]
+        if not entries:
+            raise ServiceValidationError("No Sunways station is loaded")
+
+        profiler = RefreshProfiler(hass, call.data[ATTR_REFRESHES])
+        for entry in entries:
+            entry.runtime_data.coordinator.async_start_profiling(profiler)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
@@ -0,0 +1,52 @@
+"""Websocket API for the Sunways integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the Sunways websocket commands."""
+    websocket_api.async_register_command(hass, ws_archive_query)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/archive/query",
+        vol.Required("entry_id"): str,
+        vol.Required("start_time"): vol.Coerce(float),
+        vol.Required("end_time"): vol.Coerce(float),
+    }
+)
+@websocket_api.async_response
+async def ws_archive_query(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the archived readings of a station between two UNIX timestamps."""
+    entry = hass.config_entries.async_get_entry(msg["entry_id"])
+    if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Station not loaded")
+        return
+
+    archive = entry.runtime_data.archive
+    if archive is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_SUPPORTED, "Archive not enabled")
+        return
+
+    columns = await hass.async_add_executor_job(
+        archive.query, msg["start_time"], msg["end_time"]
+    )
+    connection.send_result(
+        msg["id"], {name: column.tolist() for name, column in columns.items()}
+    )
@@ -0,0 +1,38 @@
+"""Fixtures for the Sunways tests."""
+
+from collections.abc import AsyncIterator
+
+import pytest
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sunways.api import connection
+from custom_components.sunways.const import CONF_STATION_ID, DOMAIN
+
+from .portal import STATION_ID, StandInPortal
+
+
+@pytest.fixture
+async def portal(socket_enabled, monkeypatch) -> AsyncIterator[StandInPortal]:
+    """A stand-in portal over plain HTTP, used as the API host."""
+    stand_in = StandInPortal()
+    monkeypatch.setattr(connection, "_API_HOST", await stand_in.start())
+    yield stand_in
+    await stand_in.stop()
+
+
+@pytest.fixture
+def config_entry(hass: HomeAssistant, enable_custom_integrations) -> MockConfigEntry:
+    """A config entry for the station of the stand-in portal."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Station",
+        data={
+            CONF_EMAIL: "user@example.com",
+            CONF_PASSWORD: "secret",
+            CONF_STATION_ID: STATION_ID,
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
@@ -0,0 +1,113 @@
+"""A stand-in for the Sunways portal, served from the test process."""
+
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator
+import ssl
+
+from aiohttp import web
+
+from custom_components.sunways.api import connection
+
+STATION_ID = "station-1"
+OVERVIEW = {
+    "id": STATION_ID,
+    "pac": 1500.0,
+    "pacUnit": "W",
+    "instatlledPower": 5.0,
+    "instatlledPowerUnit": "kWp",
+    "powerRatio": 30.0,
+    "pLoad": 700.0,
+    "pLoadUnit": "W",
+    "pmeterTotal": 800.0,
+    "pmeterTotalUnit": "W",
+    "arrowGridInverter": 0,
+    "arrowInverterGrid": 1,
+    "eDay": 4.2,
+    "eDayUnit": "kWh",
+    "eMonth": 120.0,
+    "eMonthUnit": "kWh",
+    "eYear": 1.1,
+    "eYearUnit": "MWh",
+    "eTotal": 3.3,
+    "eTotalUnit": "MWh",
+}
+
+
+class StandInPortal:
+    """Serves the portal endpoints used by the integration on localhost.
+
+    The overview can be changed between polls. The requests are counted per
+    path, and the client connections by their address.
+    """
+
+    def __init__(self) -> None:
+        self.overview = dict(OVERVIEW)
+        self.requests: Counter[str] = Counter()
+        self.connections: Counter[tuple] = Counter()
+        # Seconds between the bytes of a trickled overview response
+        self.trickle: float | None = None
+        # Delays of the next overview responses, in order
+        self.delays: list[float] = []
+        self.url: str | None = None
+        self._runner: web.AppRunner | None = None
+
+    async def start(self, ssl_context: ssl.SSLContext | None = None) -> str:
+        """Start serving, return the base URL."""
+        app = web.Application(middlewares=[self._count])
+        app.router.add_route("HEAD", "/", self._root)
+        app.router.add_post(connection._API_LOGIN, self._login)
+        app.router.add_get(connection._API_AUTH_INFO.split("?")[0], self._auth_info)
+        app.router.add_get(connection.API_STATION_OVERVIEW, self._overview)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0, ssl_context=ssl_context)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        scheme = "https" if ssl_context else "http"
+        self.url = f"{scheme}://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving and close the open connections."""
+        if self._runner:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests[request.path] += 1
+        self.connections[request.transport.get_extra_info("peername")] += 1
+        return await handler(request)
+
+    @staticmethod
+    def _ok(data: dict) -> web.Response:
+        return web.json_response({"code": "1000000", "msg": "success", "data": data})
+
+    async def _login(self, request: web.Request) -> web.Response:
+        response = self._ok({})
+        response.headers["token"] = "test-token"
+        return response
+
+    async def _auth_info(self, request: web.Request) -> web.Response:
+        return self._ok({"userInfo": {"email": "user@example.com"}})
+
+    async def _overview(self, request: web.Request) -> web.StreamResponse:
+        if self.delays:
+            await asyncio.sleep(self.delays.pop(0))
+        response = self._ok(self.overview)
+        if self.trickle is None:
+            return response
+
+        stream = web.StreamResponse(headers={"Content-Type": "application/json"})
+        stream.content_length = len(response.body)
+        await stream.prepare(request)
+        for byte in response.body:
+            await stream.write(bytes([byte]))
+            await asyncio.sleep(self.trickle)
+        return stream
+
+    async def _root(self, request: web.Request) -> web.Response:
+        # A landing page with a length, aiohttp closes the connection after a
+        # HEAD response without one
+        return web.Response(text="<html></html>", content_type="text/html")
@@ -0,0 +1,149 @@
+"""Tests for the tuned connection of the Sunways API client, over TLS."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+import ipaddress
+import ssl
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from custom_components.sunways.api import connection
+from custom_components.sunways.api.client import SunwaysClient
+from custom_components.sunways.api.exceptions import ConnectionFailed
+
+from .portal import STATION_ID, StandInPortal
+
+POLLS = 10
+
+
+def _self_signed(tmp_path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    """Server and client TLS contexts for a self-signed localhost certificate."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=1))
+        .not_valid_after(now + timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = tmp_path / "cert.pem"
+    key_file = tmp_path / "key.pem"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+
+    server = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server.load_cert_chain(cert_file, key_file)
+    client = ssl.create_default_context(cafile=cert_file)
+    return server, client
+
+
+@pytest.fixture
+def hedge_requests() -> bool:
+    """Whether the client hedges its requests."""
+    return False
+
+
+@pytest.fixture
+async def tls_client(
+    socket_enabled, monkeypatch, tmp_path, hedge_requests
+) -> AsyncIterator[tuple[SunwaysClient, StandInPortal]]:
+    """A tracing client with its own session, and the stand-in portal over TLS."""
+    server_ssl, client_ssl = _self_signed(tmp_path)
+    portal = StandInPortal()
+    monkeypatch.setattr(connection, "_API_HOST", await portal.start(server_ssl))
+
+    client = SunwaysClient(
+        "user@example.com", "secret", None, hedge_requests=hedge_requests, trace_requests=True
+    )
+    # Trust the self-signed certificate instead of the system CAs
+    client._api._verify_ssl = client_ssl
+    yield client, portal
+    await client.close()
+    await portal.stop()
+
+
+async def test_polls_reuse_the_warmed_up_connection(tls_client) -> None:
+    """After the warm-up, the login and all polls share one TLS connection."""
+    client, portal = tls_client
+
+    await client.warm_up()
+    for _ in range(POLLS):
+        station = await client.get_station_overview(STATION_ID)
+        assert station.id == STATION_ID
+
+    traces = client.request_traces
+    assert len(traces) == POLLS + 1
+    # No traced request paid for a handshake, the warm-up did
+    assert all(trace["reused_connection"] for trace in traces)
+    assert all(trace["connect"] is None for trace in traces)
+    assert len(portal.connections) == 1
+    assert client.metrics[connection.METRIC_REQUEST_FAILURES] == 0
+
+
+async def test_first_request_without_warm_up_pays_the_handshake(tls_client) -> None:
+    """Without a warm-up only the first request opens a connection."""
+    client, portal = tls_client
+
+    for _ in range(POLLS):
+        await client.get_station_overview(STATION_ID)
+
+    traces = client.request_traces
+    handshakes = [trace for trace in traces if not trace["reused_connection"]]
+    assert len(handshakes) == 1
+    assert handshakes[0]["connect"] is not None
+    assert sum(trace["reused_connection"] for trace in traces) / len(traces) >= POLLS / (POLLS + 1)
+    assert len(portal.connections) == 1
+
+
+async def test_trickling_response_is_cut_off(tls_client, monkeypatch) -> None:
+    """The read budget bounds the whole body, not only each socket read."""
+    client, portal = tls_client
+    monkeypatch.setattr(connection, "READ_TIMEOUT", 0.5)
+    portal.trickle = 0.01
+
+    start = time.monotonic()
+    with pytest.raises(ConnectionFailed):
+        await client.get_station_overview(STATION_ID)
+    assert time.monotonic() - start < 2
+
+
+@pytest.mark.parametrize("hedge_requests", [True])
+async def test_cancelled_hedge_is_ignored(tls_client, monkeypatch) -> None:
+    """The slow request losing against its hedge leaves no trace, and is no failure."""
+    client, portal = tls_client
+    monkeypatch.setattr(connection, "HEDGE_DEFAULT_DELAY", 0.05)
+    portal.delays = [1.0]
+
+    await client.warm_up()
+    await client.get_station_overview(STATION_ID)
+    # Let the cancelled request unwind
+    await asyncio.sleep(0.1)
+
+    assert client.metrics[connection.METRIC_HEDGED_REQUESTS] == 1
+    assert client.metrics[connection.METRIC_REQUEST_FAILURES] == 0
+    traces = client.request_traces
+    # The login, and the hedge which won
+    assert len(traces) == 2
+    assert all(trace["error"] is None for trace in traces)
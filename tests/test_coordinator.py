@@ -0,0 +1,167 @@
+"""Tests for the Sunways station coordinator."""
+
+from datetime import timedelta
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sunways import coordinator as coordinator_module
+from custom_components.sunways.api import connection
+from custom_components.sunways.const import SensorKeys
+from custom_components.sunways.coordinator import (
+    SCAN_INTERVAL,
+    SunwaysStationOverviewUpdateCoordinator,
+)
+
+from .portal import STATION_ID, StandInPortal
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+UPSTREAM_PERIOD = 300.0
+UPSTREAM_OFFSET = 7.0
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    """A monotonic clock for the coordinator, advanced by the test."""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(
+        coordinator_module, "time", SimpleNamespace(monotonic=lambda: clock.now, time=time.time)
+    )
+    return clock
+
+
+async def _setup(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> SunwaysStationOverviewUpdateCoordinator:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return config_entry.runtime_data.coordinator
+
+
+async def _poll(
+    coordinator: SunwaysStationOverviewUpdateCoordinator,
+    portal: StandInPortal,
+    clock: SimpleNamespace,
+    duration: float,
+    key: str = "pac",
+) -> int:
+    """Poll on the coordinator's schedule, the portal updating every period."""
+    end = clock.now + duration
+    polls = 0
+    while clock.now < end:
+        clock.now += coordinator.update_interval.total_seconds()
+        version = (clock.now - UPSTREAM_OFFSET) // UPSTREAM_PERIOD
+        portal.overview[key] = 1000.0 * version
+        await coordinator.async_refresh()
+        polls += 1
+    return polls
+
+
+async def test_locks_on_the_portal_updates(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry, clock
+) -> None:
+    """Polls align to the upstream updates, with fewer overview requests."""
+    coordinator = await _setup(hass, config_entry)
+
+    await _poll(coordinator, portal, clock, 6 * HOUR)
+    schedule = coordinator._schedule
+    assert schedule.locked
+    assert schedule.period == pytest.approx(UPSTREAM_PERIOD, abs=2.0)
+
+    requests = portal.requests[connection.API_STATION_OVERVIEW]
+    polls = await _poll(coordinator, portal, clock, 2 * HOUR)
+    assert portal.requests[connection.API_STATION_OVERVIEW] - requests == polls
+    assert polls < 2 * HOUR / SCAN_INTERVAL.total_seconds() / 2
+    # The connection idles past the keep-alive, it is warmed up before the poll
+    assert coordinator.update_interval.total_seconds() > connection.KEEPALIVE_TIMEOUT
+    assert coordinator._unsub_warm_up is not None
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    assert coordinator._unsub_warm_up is None
+
+
+async def test_slow_counters_do_not_lock(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry, clock
+) -> None:
+    """Only changes of the live sensors count as upstream updates."""
+    coordinator = await _setup(hass, config_entry)
+
+    await _poll(coordinator, portal, clock, 6 * HOUR, key="eDay")
+    assert not coordinator._schedule.locked
+    assert coordinator.update_interval == SCAN_INTERVAL
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+@pytest.mark.parametrize("failure", ["malformed", "timeout"])
+async def test_failed_update_polls_at_the_fixed_interval(
+    hass: HomeAssistant,
+    portal: StandInPortal,
+    config_entry: MockConfigEntry,
+    clock,
+    monkeypatch,
+    failure: str,
+) -> None:
+    """Every failure falls back to the fixed interval, the lock is kept."""
+    coordinator = await _setup(hass, config_entry)
+    await _poll(coordinator, portal, clock, 6 * HOUR)
+    assert coordinator._schedule.locked
+
+    if failure == "malformed":
+        pac = portal.overview.pop("pac")
+    else:
+        monkeypatch.setattr(coordinator_module, "UPDATE_TIMEOUT", 0.1)
+        portal.delays = [1.0]
+    clock.now += coordinator.update_interval.total_seconds()
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert coordinator.update_interval == SCAN_INTERVAL
+    assert coordinator._unsub_warm_up is None
+
+    if failure == "malformed":
+        portal.overview["pac"] = pac
+    else:
+        monkeypatch.setattr(coordinator_module, "UPDATE_TIMEOUT", coordinator_module.AUTH_TIMEOUT)
+    clock.now += SCAN_INTERVAL.total_seconds()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+
+    # Resumes aligned to the upstream updates, without learning again
+    polls = await _poll(coordinator, portal, clock, HOUR)
+    assert coordinator._schedule.locked
+    assert polls < HOUR / SCAN_INTERVAL.total_seconds() / 2
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_window_closes_before_the_boundary_sample(hass: HomeAssistant, monkeypatch) -> None:
+    """The sample closing a window only starts the next one."""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(
+        coordinator_module, "time", SimpleNamespace(monotonic=lambda: clock.now, time=time.time)
+    )
+    coordinator = SunwaysStationOverviewUpdateCoordinator(
+        hass, _LOGGER, None, STATION_ID, aggregation_window=timedelta(seconds=60)
+    )
+    key = SensorKeys.SOLAR_POWER
+
+    for clock.now, value in ((0.0, 1.0), (30.0, 3.0), (60.0, 100.0)):
+        published = coordinator._aggregate({key: value})
+
+    assert published[key] == 2.0
+    assert coordinator._published_stats[key] == {"min": 1.0, "max": 3.0, "samples": 2}
+
+    # The boundary sample is held through the next window
+    clock.now = 120.0
+    published = coordinator._aggregate({key: 4.0})
+    assert published[key] == 100.0
+    assert coordinator._published_stats[key] == {"min": 100.0, "max": 100.0, "samples": 1}
+
+    await coordinator.async_shutdown()
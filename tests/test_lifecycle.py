@@ -0,0 +1,101 @@
+"""Leak regression tests for setting up and unloading a config entry.
+
+Runs against the stand-in Sunways portal served from the test process.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sunways.api.client import SunwaysClient
+from custom_components.sunways.api.connection import SunwaysApiConnection
+from custom_components.sunways.coordinator import SunwaysStationOverviewUpdateCoordinator
+from custom_components.sunways.sensor import InverterSensorEntity
+
+from .portal import StandInPortal
+
+CYCLES = 1000
+WARM_UP_CYCLES = 50
+# Allowed growth over all cycles. Home Assistant keeps under 1 kB per unloaded
+# entity platform; a leaked session, coordinator or task per cycle is far more
+MAX_MEMORY_GROWTH = 2 * 1024 * 1024
+MAX_FD_GROWTH = 2
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def _alive(cls: type) -> int:
+    return sum(isinstance(obj, cls) for obj in gc.get_objects())
+
+
+def _usage() -> tuple[int, int, int]:
+    """Traced memory, open file descriptors and running tasks."""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0], _open_fds(), len(asyncio.all_tasks())
+
+
+async def _cycle(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.NOT_LOADED
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="Needs /proc to count file descriptors")
+async def test_setup_unload_cycles_do_not_leak(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry
+) -> None:
+    """Repeated setup and unload keeps memory, sockets and tasks flat."""
+    # The log capture keeps every record, which would count as growth
+    logging.disable(logging.CRITICAL)
+    tracemalloc.start()
+    try:
+        # Let caches, registries and lazy imports settle first
+        for _ in range(WARM_UP_CYCLES):
+            await _cycle(hass, config_entry)
+        memory, fds, tasks = _usage()
+
+        for _ in range(CYCLES):
+            await _cycle(hass, config_entry)
+        memory_after, fds_after, tasks_after = _usage()
+    finally:
+        tracemalloc.stop()
+        logging.disable(logging.NOTSET)
+
+    assert memory_after - memory < MAX_MEMORY_GROWTH
+    assert fds_after - fds <= MAX_FD_GROWTH
+    assert tasks_after <= tasks
+    for cls in (SunwaysApiConnection, SunwaysStationOverviewUpdateCoordinator, InverterSensorEntity):
+        assert _alive(cls) == 0, cls.__name__
+
+
+async def test_failed_platform_setup_releases_client(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry
+) -> None:
+    """A failure after the first refresh still closes the client and its session."""
+    with (
+        patch.object(
+            hass.config_entries,
+            "async_forward_entry_setups",
+            side_effect=RuntimeError("platform failed"),
+        ),
+        patch.object(SunwaysClient, "close", autospec=True, side_effect=SunwaysClient.close) as close,
+    ):
+        await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_ERROR
+    close.assert_awaited_once()
@@ -0,0 +1,173 @@
+"""Tests for the phase-locked polling schedule, on a simulated clock."""
+
+import importlib.util
+from pathlib import Path
+import random
+
+import pytest
+
+# Load the module on its own, the package needs Home Assistant
+_spec = importlib.util.spec_from_file_location(
+    "sunways_phase",
+    Path(__file__).parent.parent / "custom_components" / "sunways" / "phase.py",
+)
+phase = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(phase)
+
+INTERVAL = 60.0
+DAY = 24 * 60 * 60
+
+
+class Upstream:
+    """Portal which updates the station data every period, from an offset."""
+
+    def __init__(self, period: float, offset: float = 7.0) -> None:
+        self.period = period
+        self.offset = offset
+
+    def version(self, now: float) -> int:
+        return int((now - self.offset) // self.period)
+
+    def last_update(self, now: float) -> float:
+        return self.offset + self.version(now) * self.period
+
+
+class JitteryUpstream(Upstream):
+    """Portal whose updates are each shifted by a random jitter."""
+
+    def __init__(self, period: float, jitter: float, seed: int = 1) -> None:
+        super().__init__(period)
+        self._random = random.Random(seed)
+        self._jitter = jitter
+        self._shifts: dict[int, float] = {}
+
+    def _update(self, version: int) -> float:
+        if version not in self._shifts:
+            self._shifts[version] = self._random.uniform(-self._jitter, self._jitter)
+        return self.offset + version * self.period + self._shifts[version]
+
+    def version(self, now: float) -> int:
+        version = int((now - self.offset) // self.period) + 1
+        while self._update(version) > now:
+            version -= 1
+        return version
+
+    def last_update(self, now: float) -> float:
+        return self._update(self.version(now))
+
+
+class FixedSchedule:
+    """Polling at the fixed interval, for comparison."""
+
+    locked = False
+
+    def observe(self, now: float, changed: bool) -> float:
+        return INTERVAL
+
+
+def simulate(upstream: Upstream, duration: float, schedule=None, start: float = 0.0):
+    """Poll the upstream on the schedule, return the statistics of the run."""
+    schedule = schedule or phase.PhaseLockedSchedule(INTERVAL)
+    now = start
+    last_version = None
+    delays = []
+    polls = 0
+    relocks = 0
+    was_locked = schedule.locked
+    while now < start + duration:
+        version = upstream.version(now)
+        changed = last_version is not None and version != last_version
+        if changed:
+            delays.append((now, now - upstream.last_update(now)))
+        last_version = version
+        now += schedule.observe(now, changed)
+        polls += 1
+        if schedule.locked and not was_locked:
+            relocks += 1
+        was_locked = schedule.locked
+    return schedule, delays, polls, relocks
+
+
+def _mean_delay(delays, since: float) -> float:
+    recent = [delay for at, delay in delays if at >= since]
+    return sum(recent) / len(recent)
+
+
+@pytest.mark.parametrize("period", [150.0, 210.0, 300.0, 330.0, 450.0, 600.0, 900.0])
+def test_converges(period: float) -> None:
+    """Locks once on the true period, and polls right after each update."""
+    upstream = Upstream(period)
+    schedule, delays, polls, relocks = simulate(upstream, 2 * DAY)
+
+    assert schedule.locked
+    assert relocks == 1
+    assert schedule.period == pytest.approx(period, abs=2.0)
+    assert _mean_delay(delays, DAY) < 10.0
+    # Fewer requests than polling at the fixed interval
+    assert polls < 2 * DAY / INTERVAL
+
+
+@pytest.mark.parametrize("period", [30.0, 60.0, 100.0])
+def test_rejects_fast_periods(period: float) -> None:
+    """Periods too close to the poll interval keep the fixed interval."""
+    schedule, delays, polls, relocks = simulate(Upstream(period), 2 * DAY)
+    _, fixed_delays, _, _ = simulate(Upstream(period), 2 * DAY, FixedSchedule())
+
+    assert not schedule.locked
+    assert relocks == 0
+    # No worse than the fixed interval, with little learning overhead
+    assert _mean_delay(delays, DAY) < _mean_delay(fixed_delays, DAY) + 5.0
+    assert polls < 1.1 * 2 * DAY / INTERVAL
+
+
+def test_tolerates_jitter() -> None:
+    """Jittery upstream updates keep the lock, and beat the fixed interval."""
+    schedule, delays, polls, relocks = simulate(JitteryUpstream(300.0, 5.0), 2 * DAY)
+
+    assert schedule.locked
+    assert relocks == 1
+    assert _mean_delay(delays, DAY) < 15.0
+    assert polls < 2 * DAY / INTERVAL / 2
+
+
+def test_follows_drift() -> None:
+    """A changed upstream period is followed without losing the lock."""
+    schedule, _, _, _ = simulate(Upstream(300.0), DAY)
+    assert schedule.locked
+
+    schedule, delays, _, relocks = simulate(
+        Upstream(304.0, offset=DAY + 11.0), DAY, schedule, start=DAY
+    )
+    assert schedule.locked
+    assert relocks == 0
+    assert schedule.period == pytest.approx(304.0, abs=2.0)
+    assert _mean_delay(delays, 1.5 * DAY) < 10.0
+
+
+def test_unlocks_when_updates_stop() -> None:
+    """Without upstream updates the lock is dropped for the fixed interval."""
+    schedule, _, _, _ = simulate(Upstream(300.0), DAY)
+    assert schedule.locked
+
+    # Upstream never updates again
+    schedule, _, polls, _ = simulate(Upstream(10 * DAY, offset=0.0), DAY, schedule, start=DAY)
+    assert not schedule.locked
+    assert polls < 1.1 * DAY / INTERVAL
+    assert schedule.observe(2 * DAY, False) == INTERVAL
+
+
+def test_keeps_lock_through_failures() -> None:
+    """Failed polls fall back to the fixed interval, then resume aligned."""
+    upstream = Upstream(300.0)
+    schedule, _, _, _ = simulate(upstream, DAY)
+    assert schedule.locked
+
+    now = DAY
+    while now < DAY + 60 * 60:
+        assert schedule.failed() == INTERVAL
+        now += INTERVAL
+
+    schedule, delays, _, relocks = simulate(upstream, DAY, schedule, start=now)
+    assert schedule.locked
+    assert relocks == 0
+    assert _mean_delay(delays, now) < 10.0
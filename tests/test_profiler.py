@@ -0,0 +1,79 @@
+"""Tests for profiling the coordinator refreshes."""
+
+import cProfile
+from pathlib import Path
+import pstats
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sunways.const import DOMAIN
+from custom_components.sunways.services import ATTR_REFRESHES, SERVICE_PROFILE
+
+from .portal import StandInPortal
+
+
+@pytest.fixture(autouse=True)
+def config_dir(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Write the profiles to a directory of the test."""
+    hass.config.config_dir = str(tmp_path)
+
+
+async def _setup(hass: HomeAssistant, config_entry: MockConfigEntry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return config_entry.runtime_data.coordinator
+
+
+async def _profile(hass: HomeAssistant, refreshes: int) -> None:
+    await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, {ATTR_REFRESHES: refreshes}, blocking=True
+    )
+
+
+def _profiled_functions(hass: HomeAssistant) -> set[str]:
+    paths = list(Path(hass.config.path()).glob("sunways_profile_*.prof"))
+    assert len(paths) == 1
+    return {name for _, _, name in pstats.Stats(str(paths[0])).stats}
+
+
+async def test_profiles_only_the_cpu_bound_sections(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry
+) -> None:
+    """The conversion and state writes are profiled, the network waits are not."""
+    coordinator = await _setup(hass, config_entry)
+
+    await _profile(hass, 2)
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    functions = _profiled_functions(hass)
+    assert "_update_readings" in functions
+    assert "async_write_ha_state" in functions
+    assert "_do_request" not in functions
+
+
+async def test_refresh_survives_another_active_profiler(
+    hass: HomeAssistant, portal: StandInPortal, config_entry: MockConfigEntry
+) -> None:
+    """With another profiler running, the refresh runs unprofiled and polling goes on."""
+    coordinator = await _setup(hass, config_entry)
+
+    await _profile(hass, 2)
+    other = cProfile.Profile()
+    other.enable()
+    try:
+        await coordinator.async_refresh()
+    finally:
+        other.disable()
+
+    assert coordinator.last_update_success
+    assert coordinator._unsub_refresh is not None
+
+    # The failed profiler is dropped, later refreshes are not profiled
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert coordinator._profiler is None
+    assert not list(Path(hass.config.path()).glob("sunways_profile_*.prof"))